@@ -1,11 +1,16 @@
 """Extensions to netCDF4 classes to support vertical remapping."""
-from re import match
-
 from netCDF4 import Dataset
+from numpy import dtype, prod
 
 from .units_converter import basic_converter, pressure
 
 
+copy_buffer_size = 64*1024*1024
+"""Approximate number of bytes read at a time when copying variable data."""
+
+_pressure_units = tuple(x.regex for x in basic_converter.units if x.type == pressure)
+
+
 class CfVariable(object):
     """Extension of the basic netCDF4 Variable class.
 
@@ -17,14 +22,12 @@ class CfVariable(object):
         vertically_remappable: Flag telling if this variable is remappabled.
     """
 
-    def __init__(self, variable, pressure_coordinates):
+    def __init__(self, variable, pressure_map):
         self.parent = variable
-        dimensions = [x.name for x in variable.get_dims()]
-        for coordinate in pressure_coordinates:
-            if coordinate.name != variable.name and coordinate.name in dimensions:
-                self.pressure = coordinate[...]
-                self.pressure_units = coordinate.getncattr("units")
-                self.pressure_index = dimensions.index(coordinate.name)
+        for i, name in enumerate(variable.dimensions):
+            if name in pressure_map and name != variable.name:
+                self.pressure, self.pressure_units = pressure_map[name]
+                self.pressure_index = i
                 self.vertically_remappable = True
                 break
         else:
@@ -109,13 +112,13 @@ class CfDataset(Dataset):
             The variable in the current dataset.
         """
         for dimension in variable.get_dims():
-            try:
+            if dimension.name not in self.dimensions:
                 self.copy_dimension(dimension)
                 self.copy_variable(dataset.variables[dimension.name], dataset)
-            except RuntimeError:
-                if dimension.size != self.dimensions[dimension.name].size:
-                    raise
-        names = [x.name for x in variable.get_dims()]
+            elif dimension.size != self.dimensions[dimension.name].size:
+                raise RuntimeError("dimension {} already exists with a different size.".format(
+                                   dimension.name))
+        names = variable.dimensions
         fill = None if "_FillValue" not in variable.ncattrs() else variable.getncattr("_FillValue")
         v = self.createVariable(variable.name, variable.datatype, names, fill_value=fill)
         for attr in variable.ncattrs():
@@ -130,7 +133,17 @@ class CfDataset(Dataset):
             variable: Variable from another dataset.
         """
         v = self.variables[variable.name]
-        v[...] = variable[...]
+        if not variable.shape:
+            v[...] = variable[...]
+            return
+        slab = max(1, dtype(variable.dtype).itemsize)*int(prod(variable.shape[1:]))
+        step = max(1, copy_buffer_size//max(1, slab))
+        chunking = variable.chunking()
+        if chunking not in (None, "contiguous"):
+            #Align the copies with the chunks in the file.
+            step = max(1, step//chunking[0])*chunking[0]
+        for i in range(0, variable.shape[0], step):
+            v[i:i+step, ...] = variable[i:i+step, ...]
 
     @property
     def dimension_variables(self):
@@ -139,7 +152,7 @@ class CfDataset(Dataset):
         Yields:
             Variable objects for each dimension.
         """
-        for name in self.dimensions.keys():
+        for name in self.dimensions:
             yield self.variables[name]
 
     def is_pressure_coordinate(self, variable):
@@ -151,10 +164,8 @@ class CfDataset(Dataset):
         Returns:
             Flag telling if the dimension is a pressure coordinate.
         """
-        for unit in basic_converter.units:
-            if match(unit.regex, variable.getncattr("units")) and unit.type == pressure:
-                return True
-        return False
+        units = variable.getncattr("units")
+        return any(x.match(units) for x in _pressure_units)
 
     @property
     def pressure_coordinates(self):
@@ -1,9 +1,13 @@
 """Combines netCDF datasets.  Requires ncrcat and ncpdq from CDO."""
-from os.path import basename, join
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+from os.path import abspath, basename, dirname, join
 from shutil import which
 from subprocess import run
 from tempfile import TemporaryDirectory
 
+from netCDF4 import Dataset
+
 from .commands import Command
 
 
@@ -23,6 +27,8 @@ class Combine(Command):
         parser = subparsers.add_parser(command, help="{} help.".format(command))
         parser.add_argument("datasets", nargs="+", help="input datasets.")
         parser.add_argument("output", help="output file path.")
+        parser.add_argument("-j", "--jobs", type=int,
+                            help="number of datasets to unpack concurrently.")
         parser.set_defaults(func=combine_)
 
 
@@ -35,47 +41,80 @@ def combine_(args):
     Raises:
         EnvironmentError if ncrcat and/or ncpdq are/is not found.
     """
-    combine(args.datasets, args.output)
+    combine(args.datasets, args.output, args.jobs)
 
-def combine(datasets, output):
+def combine(datasets, output, jobs=None):
     """Concatenates netCDF datasets together.
 
     Args:
         datasets: List of paths to input files.
         output: Path to output file.
+        jobs: Maximum number of datasets to unpack concurrently.  Defaults to the
+              number of processors.
+
+    Raises:
+        EnvironmentError if ncrcat and/or ncpdq are/is not found.
+    """
+    check_installed()
+    cat(sorted(datasets), output, jobs)
+
+
+def check_installed():
+    """Checks that the external tools needed to combine datasets are available.
 
     Raises:
         EnvironmentError if ncrcat and/or ncpdq are/is not found.
     """
     if which(ncrcat) is None or which(ncpdq) is None:
         raise EnvironmentError("you must have {} and {} installed.".format(ncrcat, ncpdq))
-    cat(sorted(datasets), output)
 
 
-def unpack(datasets, directory):
-    """Unpacks datasets, to avoid any nasty surprises when running ncrcat.
+def is_packed(dataset):
+    """Determines if any variables in a dataset are packed.
+
+    Args:
+        dataset: Path to netCDF dataset.
+
+    Returns:
+        Flag telling if any variable has scale_factor or add_offset attributes.
+    """
+    packing = ("scale_factor", "add_offset")
+    with Dataset(dataset, "r") as data:
+        return any(x in v.ncattrs() for v in data.variables.values() for x in packing)
+
+
+def unpack(datasets, directory, jobs=None):
+    """Unpacks datasets, to avoid any nasty surprises when running ncrcat.  Datasets
+       that are not packed are used in place.
 
     Args:
         datasets: List of netCDF dataset paths.
         directory: Directory where the unpacked datasets are stored.
+        jobs: Maximum number of ncpdq processes to run at once.  Defaults to the
+              number of processors.
 
     Returns:
         paths: List of unpacked netCDF datasets.
     """
-    paths = []
-    for dataset in datasets:
-        paths.append(join(directory, basename(dataset)))
-        run([ncpdq, "--unpack", dataset, paths[-1]], check=True)
+    paths = [join(directory, basename(x)) if is_packed(x) else x for x in datasets]
+    with ThreadPoolExecutor(max_workers=jobs or cpu_count() or 1) as executor:
+        futures = [executor.submit(run, [ncpdq, "--unpack", x, y], check=True)
+                   for x, y in zip(datasets, paths) if x != y]
+    for future in futures:
+        future.result()
     return paths
 
 
-def cat(datasets, output):
+def cat(datasets, output, jobs=None):
     """Concatenates datasets together.
 
     Args:
         datasets: List of netCDF dataset paths.
         output: Path to the output netCDF dataset.
+        jobs: Maximum number of datasets to unpack concurrently.
     """
-    with TemporaryDirectory() as directory:
-        paths = unpack(datasets, directory)
+    #Unpacked datasets are larger than the inputs, so keep them next to the output instead
+    #of in the system temporary directory.
+    with TemporaryDirectory(dir=dirname(abspath(output))) as directory:
+        paths = unpack(datasets, directory, jobs)
         run([ncrcat] + paths + [output], check=True)
@@ -1,11 +1,20 @@
 """Downloads ERA5 data for radiation calculations from the Copernicus Data Store."""
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath, basename, dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
 
 from cdsapi import Client
 
+from .combine import check_installed, combine
 from .commands import Command
 
 
+max_requests = 4
+"""Maximum number of CDS requests that are run at the same time."""
+
+
 class Download(Command):
     @staticmethod
     def arguments(subparsers):
@@ -21,12 +30,18 @@ class Download(Command):
         parser.add_argument("timescale", choices=["hourly", "monthly"])
         parser.add_argument("-y", help="Starting year.", type=int)
         parser.add_argument("-Y", help="Ending year.", type=int)
-        parser.add_argument("-m", help="Starting month.", type=int)
-        parser.add_argument("-M", help="Ending month.", type=int)
-        parser.add_argument("-d", help="Starting day.", type=int)
-        parser.add_argument("-D", help="Ending day.", type=int)
-        parser.add_argument("-t", help="Starting hour.", type=int)
-        parser.add_argument("-T", help="Ending hour.", type=int)
+        parser.add_argument("-m", help="Starting month.", type=int, choices=range(1, 13),
+                            metavar="1-12")
+        parser.add_argument("-M", help="Ending month.", type=int, choices=range(1, 13),
+                            metavar="1-12")
+        parser.add_argument("-d", help="Starting day.", type=int, choices=range(1, 32),
+                            metavar="1-31")
+        parser.add_argument("-D", help="Ending day.", type=int, choices=range(1, 32),
+                            metavar="1-31")
+        parser.add_argument("-t", help="Starting hour.", type=int, choices=range(24),
+                            metavar="0-23")
+        parser.add_argument("-T", help="Ending hour.", type=int, choices=range(24),
+                            metavar="0-23")
         parser.set_defaults(func=download_)
 
 
@@ -52,8 +67,12 @@ def download(level_output, single_output, timescale, y, Y, m, M, d=None,
         Y: Ending year.
         m: Starting month.
         M: Ending month.
+
+    Raises:
+        ValueError if a year, month, day, or hour range is empty.
+        RuntimeError if any request fails, naming the failed requests and the directories
+        where the yearly files of the affected outputs were kept.
     """
-    client = Client()
     Product = namedtuple("Product", ("type", "level_name", "single_name"))
     monthly = Product(type="monthly_averaged_reanalysis",
                       level_name="reanalysis-era5-pressure-levels-monthly-means",
@@ -62,53 +81,102 @@ def download(level_output, single_output, timescale, y, Y, m, M, d=None,
                      single_name="reanalysis-era5-single-levels")
     products = {"monthly" : monthly, "hourly" : hourly}
 
-    years = tuple([x for x in range(y, Y+1)])
-    months = tuple([x for x in range(m, M+1)])
+    years = tuple(range(y, Y+1))
+    months = tuple(range(m, M+1))
     try:
-        days = tuple([x for x in range(d, D+1)])
+        days = tuple(range(d, D+1))
     except TypeError:
         days = None
     try:
-        times = tuple([x for x in range(t, T+1)])
+        times = tuple(range(t, T+1))
     except TypeError:
         times = None
+    for name, values in (("year", years), ("month", months), ("day", days), ("hour", times)):
+        if values is not None and not values:
+            raise ValueError("empty {} range.".format(name))
 
     #Level variables.
-    variables = ("ozone_mass_mixing_ratio", "specific_humidity", "temperature",
-                 "fraction_of_cloud_cover", "specific_cloud_ice_water_content",
-                 "specific_cloud_liquid_water_content")
+    level_variables = ("ozone_mass_mixing_ratio", "specific_humidity", "temperature",
+                       "fraction_of_cloud_cover", "specific_cloud_ice_water_content",
+                       "specific_cloud_liquid_water_content")
     pressure_levels = (1, 2, 3, 5, 7, 10, 20, 30, 50, 70, 100, 125, 150, 175, 200,
                        225, 250, 300, 350, 400, 450, 500, 550, 600, 650, 700, 750,
                        775, 800, 825, 850, 875, 900, 925, 950, 975, 1000)
-    retrieve(client, products[timescale].level_name, products[timescale].type, level_output,
-             variables, years, months, days=days, times=times, pressure_levels=pressure_levels)
 
     #Surface and TOA variables.
-    variables = ("near_ir_albedo_for_diffuse_radiation",
-                 "near_ir_albedo_for_direct_radiation",
-                 "skin_temperature",
-                 "surface_pressure",
-                 "toa_incident_solar_radiation",
-                 "uv_visible_albedo_for_diffuse_radiation",
-                 "uv_visible_albedo_for_direct_radiation",
-                 "2m_temperature",
-                 "mean_surface_downward_long_wave_radiation_flux_clear_sky",
-                 "mean_surface_downward_short_wave_radiation_flux_clear_sky",
-                 "mean_surface_net_long_wave_radiation_flux_clear_sky",
-                 "mean_surface_net_short_wave_radiation_flux_clear_sky",
-                 "mean_top_downward_short_wave_radiation_flux",
-                 "mean_top_net_long_wave_radiation_flux_clear_sky",
-                 "mean_top_net_short_wave_radiation_flux_clear_sky"
-                 "mean_surface_downward_long_wave_radiation_flux",
-                 "mean_surface_downward_short_wave_radiation_flux",
-                 "mean_surface_downward_uv_radiation_flux",
-                 "mean_surface_net_long_wave_radiation_flux",
-                 "mean_surface_net_short_wave_radiation_flux",
-                 "mean_top_downward_short_wave_radiation_flux",
-                 "mean_top_net_long_wave_radiation_flux",
-                 "mean_top_net_short_wave_radiation_flux")
-    retrieve(client, products[timescale].single_name, products[timescale].type, single_output,
-             variables, years, months, days=days, times=times)
+    single_variables = ("near_ir_albedo_for_diffuse_radiation",
+                        "near_ir_albedo_for_direct_radiation",
+                        "skin_temperature",
+                        "surface_pressure",
+                        "toa_incident_solar_radiation",
+                        "uv_visible_albedo_for_diffuse_radiation",
+                        "uv_visible_albedo_for_direct_radiation",
+                        "2m_temperature",
+                        "mean_surface_downward_long_wave_radiation_flux_clear_sky",
+                        "mean_surface_downward_short_wave_radiation_flux_clear_sky",
+                        "mean_surface_net_long_wave_radiation_flux_clear_sky",
+                        "mean_surface_net_short_wave_radiation_flux_clear_sky",
+                        "mean_top_downward_short_wave_radiation_flux",
+                        "mean_top_net_long_wave_radiation_flux_clear_sky",
+                        "mean_top_net_short_wave_radiation_flux_clear_sky",
+                        "mean_surface_downward_long_wave_radiation_flux",
+                        "mean_surface_downward_short_wave_radiation_flux",
+                        "mean_surface_downward_uv_radiation_flux",
+                        "mean_surface_net_long_wave_radiation_flux",
+                        "mean_surface_net_short_wave_radiation_flux",
+                        "mean_top_downward_short_wave_radiation_flux",
+                        "mean_top_net_long_wave_radiation_flux",
+                        "mean_top_net_short_wave_radiation_flux")
+
+    requests = ((products[timescale].level_name, level_output, level_variables,
+                 pressure_levels),
+                (products[timescale].single_name, single_output, single_variables, None))
+    if len(years) > 1:
+        #Fail before downloading anything if the yearly files cannot be combined.
+        check_installed()
+
+    #Each year of each dataset is an independent request, so let CDS work on several of them
+    #at the same time.  Clients are not shared between threads.  Yearly files are stored in
+    #a directory next to the output, since they can be too large for the system temporary
+    #directory.
+    outputs = []
+    with ThreadPoolExecutor(max_workers=max_requests) as executor:
+        for name, output, variables, levels in requests:
+            if len(years) == 1:
+                paths = [output]
+            else:
+                directory = mkdtemp(prefix="{}.".format(basename(output)),
+                                    dir=dirname(abspath(output)))
+                paths = [join(directory, "{}-{:04d}.nc".format(name, x)) for x in years]
+            futures = [executor.submit(retrieve, Client(), name, products[timescale].type,
+                                       path, variables, (year,), months, days=days,
+                                       times=times, pressure_levels=levels)
+                       for year, path in zip(years, paths)]
+            outputs.append((name, paths, output, futures))
+
+    #Combine each output whose requests all succeeded.  The yearly files of the other
+    #outputs are kept, so that they do not have to be requested again.
+    errors, messages = [], []
+    for name, paths, output, futures in outputs:
+        failed = [(year, x.exception()) for year, x in zip(years, futures)
+                  if x.exception() is not None]
+        for year, error in failed:
+            errors.append(error)
+            messages.append("request for {} {:04d} failed: {}".format(name, year, error))
+        if len(paths) == 1:
+            continue
+        if not failed:
+            try:
+                combine(paths, output)
+            except Exception as error:
+                errors.append(error)
+                messages.append("combining {} failed: {}".format(output, error))
+            else:
+                rmtree(dirname(paths[0]))
+                continue
+        messages.append("yearly files for {} were kept in {}".format(output, dirname(paths[0])))
+    if errors:
+        raise RuntimeError("; ".join(messages) + ".") from errors[0]
 
 
 def retrieve(client, name, product, output, variables, years, months, days=None, times=None,
@@ -127,7 +195,7 @@ def retrieve(client, name, product, output, variables, years, months, days=None,
         times: Tuple of times.
         pressure_levels: Tuple of pressure levels.
      """
-    parameters = {"format" : "netcdf", "month" : ["{:02}".format(x) for x in months],
+    parameters = {"format" : "netcdf", "month" : ["{:02d}".format(x) for x in months],
                   "product_type" : product, "variable" : variables,
                   "year": ["{:04d}".format(x) for x in years]}
     if days is not None:
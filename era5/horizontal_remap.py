@@ -1,8 +1,12 @@
 """Horizontally remaps netCDF data."""
-from os.path import join
+from hashlib import sha1
+from os import close, makedirs, remove, replace
+from os.path import dirname, exists, join
 from shutil import which
 from subprocess import run
-from tempfile import TemporaryDirectory
+from tempfile import mkstemp, TemporaryDirectory
+
+from netCDF4 import Dataset
 
 from .commands import Command
 
@@ -21,6 +25,8 @@ class HorizontalRemap(Command):
         parser.add_argument("output", help="Output file path.")
         parser.add_argument("nlon", help="Number of longitude points.", type=int)
         parser.add_argument("nlat", help="Number of latitude points.", type=int)
+        parser.add_argument("--weights-cache",
+                            help="Directory where remapping weights are saved and reused.")
         parser.set_defaults(func=remap_)
 
 
@@ -30,10 +36,10 @@ def remap_(args):
     Args:
         args: Namespace object returned by ArgumentParser().parse_args().
     """
-    remap(args.dataset, args.output, args.nlon, args.nlat)
+    remap(args.dataset, args.output, args.nlon, args.nlat, args.weights_cache)
 
 
-def remap(dataset, output, nlon, nlat):
+def remap(dataset, output, nlon, nlat, weights_cache=None):
     """Perform horizontal remapping on an entire dataset using cdo.
 
     Args:
@@ -41,6 +47,8 @@ def remap(dataset, output, nlon, nlat):
         output: Path to output netCDF4 dataset.
         nlon: Number of longitude points to remap to.
         nlat: Number of latitude points to remap to.
+        weights_cache: Directory where remapping weights are saved, so that they can be
+                       reused for other datasets on the same grid.
 
     Raises:
         EnvironmentError if cdo is not found.
@@ -49,6 +57,46 @@ def remap(dataset, output, nlon, nlat):
     if which(cdo) is None:
         raise EnvironmentError("you must have {} installed.".format(cdo))
     with TemporaryDirectory() as directory:
-        weights = join(directory, "remap-weights.nc")
-        run([cdo, "gencon,r{}x{}".format(nlon, nlat), dataset, weights], check=True)
+        key = None if weights_cache is None else grid_hash(dataset)
+        if key is None:
+            weights = join(directory, "remap-weights.nc")
+        else:
+            makedirs(weights_cache, exist_ok=True)
+            weights = join(weights_cache, "{}-r{}x{}.nc".format(key, nlon, nlat))
+        if not exists(weights):
+            #Write to a unique temporary file first, so a failed run never leaves partial
+            #weights behind, and runs sharing the cache never write to the same file.
+            descriptor, partial = mkstemp(suffix=".nc", dir=dirname(weights))
+            close(descriptor)
+            try:
+                run([cdo, "gencon,r{}x{}".format(nlon, nlat), dataset, partial], check=True)
+                replace(partial, weights)
+            except BaseException:
+                remove(partial)
+                raise
         run([cdo, "-f", "nc4", "remap,r{}x{},{}".format(nlon, nlat, weights), dataset, output], check=True)
+
+
+def grid_hash(dataset):
+    """Calculates a hash of a dataset's horizontal grid.
+
+    Args:
+        dataset: Path to netCDF4 dataset.
+
+    Returns:
+        Hex digest of the latitude and longitude coordinate values, or None if the dataset
+        does not contain any.
+    """
+    units = ("degrees_north", "degrees_east")
+    sha = sha1()
+    found = False
+    with Dataset(dataset, "r") as data:
+        for name in sorted(data.dimensions):
+            if name not in data.variables:
+                continue
+            v = data.variables[name]
+            if "units" in v.ncattrs() and v.getncattr("units") in units:
+                sha.update(name.encode())
+                sha.update(v[...].tobytes())
+                found = True
+    return sha.hexdigest() if found else None
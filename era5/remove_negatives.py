@@ -1,6 +1,6 @@
 """Removes negative values from variables in a netCDF dataset."""
 from netCDF4 import Dataset
-from numpy import argwhere
+from numpy.ma import filled
 
 from .commands import Command
 
@@ -37,15 +37,15 @@ def remove_negatives(path):
     blacklist = ["msdwlwrfcs", "msdwswrfcs", "msnlwrfcs", "msnswrfcs",
                  "mtdwswrf", "mtnlwrfcs", "mtnswrfcs"]
     with Dataset(path, "a") as dataset:
-        blacklist += [x for x in dataset.dimensions.keys()]
+        blacklist += list(dataset.dimensions)
         for name, v in dataset.variables.items():
             if name in blacklist:
                 continue
             data = v[...]
-            indices = argwhere(data < 0.)
-            if indices.shape[0] == 0:
+            negative = filled(data < 0., False)
+            if not negative.any():
                 continue
             scale, offset = v.getncattr("scale_factor"), v.getncattr("add_offset")
             smallest_positive = scale*(v.datatype.type(-1.*offset/scale) + 1) + offset
-            for i in range(indices.shape[0]):
-                v[tuple(indices[i,...])] = smallest_positive
+            data[negative] = smallest_positive
+            v[...] = data
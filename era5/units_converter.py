@@ -1,6 +1,7 @@
 """Units conversion calculator."""
 from collections import namedtuple
-from re import match
+from operator import add, sub
+from re import compile as compile_regex, UNICODE
 
 
 class UnitsError(Exception):
@@ -14,11 +15,23 @@ class UnitsConverter(object):
     """A simple framework for converting units.
 
     Attributes:
-        units: Tuple of Conversion namedtuples.
+        units: Tuple of Conversion namedtuples, with compiled regular expressions.
     """
 
     def __init__(self, units):
-        self.units = units
+        self.units = tuple(x._replace(regex=compile_regex(x.regex)) for x in units)
+        self._conversions = {}
+
+        #Look up every spelling that the regular expressions can match directly.  This stops
+        #at the first expression that cannot be expanded, so that the order in which the
+        #expressions are tried is still respected.
+        self._to_si = {}
+        for unit in self.units:
+            names = spellings(unit.regex.pattern) if unit.regex.flags == UNICODE else None
+            if names is None:
+                break
+            for name in names:
+                self._to_si.setdefault(name, (unit.type, unit.factor))
 
     def convert(self, source, destination):
         """Converts from one set of units (source) to another (destination).
@@ -33,9 +46,14 @@ class UnitsConverter(object):
         Raises:
             UnitsError if source and destination are not compatible.
         """
+        try:
+            return self._conversions[(source, destination)]
+        except KeyError:
+            pass
         type1, to_si = self.to_si(source)
         type2, from_si = self.from_si(destination)
         if type1 == type2:
+            self._conversions[(source, destination)] = to_si*from_si
             return to_si*from_si
         raise UnitsError("Cannot convert {} to {}.".format(source, destination))
 
@@ -63,31 +81,111 @@ class UnitsConverter(object):
         Raises:
             UnitsError if units not found in the converter.
         """
+        try:
+            return self._to_si[units]
+        except KeyError:
+            pass
         for unit in self.units:
-            if match(unit.regex, units):
+            if unit.regex.match(units):
+                self._to_si[units] = unit.type, unit.factor
                 return unit.type, unit.factor
         raise UnitsError("{} not found in converter.".format(units))
 
 
-class Units(object):
-    def __init__(self, current=0, distance=0, intensity=0, mass=0, mole=0,
-                 temperature=0, time=0):
-        self.current = current
-        self.distance = distance
-        self.intensity = intensity
-        self.mass = mass
-        self.mole = mole
-        self.temperature = temperature
-        self.time = time
+def spellings(regex):
+    """Expands a regular expression into all of the strings it can match.
+
+    Only literal characters, character sets, groups with alternatives, the ? quantifier,
+    and a final $ are supported.
+
+    Args:
+        regex (string): Regular expression, as used by re.match.
+
+    Returns:
+        Set of strings, or None if the expression cannot be expanded.
+    """
+    if not regex.endswith("$"):
+        #re.match accepts any suffix without the $ anchor.
+        return None
+    try:
+        names, i = _alternatives(regex[:-1], 0)
+    except ValueError:
+        return None
+    return names if i == len(regex) - 1 else None
+
+
+def _alternatives(regex, i):
+    """Expands alternatives separated by | until a closing parenthesis or the end."""
+    names, i = _sequence(regex, i)
+    while i < len(regex) and regex[i] == "|":
+        more, i = _sequence(regex, i + 1)
+        names |= more
+    return names, i
+
+
+def _sequence(regex, i):
+    """Expands a sequence of (optionally quantified) atoms."""
+    names = {""}
+    while i < len(regex) and regex[i] not in "|)":
+        if regex[i] == "(":
+            if regex.startswith("(?", i):
+                raise ValueError("unsupported group extension.")
+            atom, i = _alternatives(regex, i + 1)
+            if i == len(regex) or regex[i] != ")":
+                raise ValueError("unbalanced parentheses.")
+        elif regex[i] == "[":
+            end = regex.find("]", i)
+            if end < 0:
+                raise ValueError("unbalanced brackets.")
+            atom = set(regex[i+1:end])
+            if not atom or atom & set("^-\\["):
+                raise ValueError("unsupported character set.")
+            i = end
+        elif regex[i] in ".*+?{}^$\\":
+            raise ValueError("unsupported character {}.".format(regex[i]))
+        else:
+            atom = {regex[i]}
+        i += 1
+        if i < len(regex) and regex[i] == "?":
+            atom = atom | {""}
+            i += 1
+        names = {x + y for x in names for y in atom}
+    return names, i
+
+
+class Units(namedtuple("Units", ("current", "distance", "intensity", "mass", "mole",
+                                 "temperature", "time"))):
+    __slots__ = ()
+
+    def __new__(cls, current=0, distance=0, intensity=0, mass=0, mole=0, temperature=0,
+                time=0):
+        return super().__new__(cls, current, distance, intensity, mass, mole, temperature,
+                               time)
 
     def __eq__(self, y):
-        return all([value == getattr(y, key) for key, value in vars(self).items()])
+        return isinstance(y, Units) and tuple.__eq__(self, y)
+
+    def __ne__(self, y):
+        return not self == y
+
+    __hash__ = tuple.__hash__
+
+    def __add__(self, y):
+        raise TypeError("units can only be multiplied or divided.")
+
+    __radd__ = __add__
 
     def __mul__(self, y):
-        return Units(**{key: value + getattr(y, key) for key, value in vars(self).items()})
+        if not isinstance(y, Units):
+            raise TypeError("units can only be multiplied by units.")
+        return Units(*map(add, self, y))
+
+    __rmul__ = __add__
 
     def __truediv__(self, y):
-        return Units(**{key: value - getattr(y, key) for key, value in vars(self).items()})
+        if not isinstance(y, Units):
+            raise TypeError("units can only be divided by units.")
+        return Units(*map(sub, self, y))
 
 
 #Fundamental units.
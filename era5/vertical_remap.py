@@ -1,13 +1,18 @@
 """Vertically remaps netCDF data."""
 from netCDF4 import Dataset
-from numpy import append, asarray, copy, linspace, moveaxis, ravel, reshape, searchsorted, zeros
-from scipy.interpolate import interp1d
+from numpy import arange, asarray, copyto, empty, float32, float64, intp, linspace, \
+                  maximum, minimum, moveaxis, newaxis, ravel, reshape, result_type, \
+                  searchsorted, subtract, where
 
 from .cf_netcdf import CfDataset, CfVariable
 from .commands import Command
 from .units_converter import basic_converter, pressure
 
 
+column_block_size = 4096
+"""Number of columns that are interpolated at a time when remapping a variable."""
+
+
 class VerticalRemap(Command):
     @staticmethod
     def arguments(subparsers):
@@ -21,6 +26,8 @@ class VerticalRemap(Command):
         parser.add_argument("level_file", help="File path for pressure level data.")
         parser.add_argument("single_file", help="File path for single level data.")
         parser.add_argument("output", help="Output file path.")
+        parser.add_argument("--double-precision", action="store_true",
+                            help="Remap in double instead of single precision.")
         parser.set_defaults(func=remap_)
 
 
@@ -30,12 +37,17 @@ def remap_(args):
     Args:
         args: Namespace object returned by ArgumentParser().parse_args().
     """
-    remap(args.level_file, args.single_file, args.output),
+    remap(args.level_file, args.single_file, args.output,
+          float64 if args.double_precision else float32)
 
 
-def remap(level_file, single_file, output):
-    era_interim_remapper.remap_all(level_file, single_file, output,
-                                   "sp", {"t" : "t2m"}, basic_converter)
+def remap(level_file, single_file, output, dtype=float32):
+    if dtype == era_interim_remapper.dtype:
+        remapper = era_interim_remapper
+    else:
+        remapper = VerticalRemapper(a_era_interim, b_era_interim, "hPa",
+                                    level_map_era_interim, dtype)
+    remapper.remap_all(level_file, single_file, output, "sp", {"t" : "t2m"}, basic_converter)
 
 
 class VerticalRemapper(object):
@@ -46,49 +58,76 @@ class VerticalRemapper(object):
         b: Surface pressure coefficients.
         units: Units of the self.a pressure parameters.
         level_map: Map from pressure levels to a and b parameters.
+        dtype: Floating point type that the calculations are done in.
     """
 
-    def __init__(self, a, b, units, level_map):
-        self.a = copy(a)
-        self.b = copy(b)
+    def __init__(self, a, b, units, level_map, dtype=float32):
+        self.a = asarray(a, dtype=dtype)
+        self.b = asarray(b, dtype=dtype)
         self.units = units
         self.level_map = level_map
+        self.dtype = dtype
+        levels = asarray(level_map, dtype=intp)
+        self._a_sum = self.a[levels] + self.a[levels+1]
+        self._b_sum = self.b[levels] + self.b[levels+1]
 
     def pressure(self, surface_pressure, units, converter):
         """Calculates the pressures that the column will be remapped to.
 
         Args:
-            surface_pressure: Surface pressure.
+            surface_pressure: Surface pressure, either a scalar or an array of columns.
             units: Surface pressure units.
             converter: UnitsConverter object.
+
+        Returns:
+            Array of pressures, with the new levels as the last dimension.
         """
-        conversion = converter.convert(self.units, units)
-        pressure = zeros(len(self.level_map))
-        for i, level in enumerate(self.level_map):
-            phalf_lower = self.a[level]*conversion + self.b[level]*surface_pressure
-            phalf_upper = self.a[level+1]*conversion + self.b[level+1]*surface_pressure
-            pressure[i] = 0.5*(phalf_lower + phalf_upper)
-        return pressure
+        return self._pressure(self._a_sum*converter.convert(self.units, units),
+                              surface_pressure)
 
+    def _pressure(self, a_sum, surface_pressure):
+        """Calculates the new pressures from the a parameter sums, already in the surface
+           pressure units.
+        """
+        surface_pressure = asarray(surface_pressure, dtype=self.dtype)[..., newaxis]
+        return 0.5*(a_sum + self._b_sum*surface_pressure)
 
-    def remap_column(self, variable, pressure, surface_pressure, pressure_units, converter,
-                     fill_value=0):
-        """Remap a column to new pressures.
+    def remap_variable(self, variable, surface_values, surface_pressure, indices, converter):
+        """Vertically remaps a variable.
 
         Args:
-            variable: Column variable to remap.
-            pressure: Pressures the column variable is currently specified at.
-            surface_pressure: Surface pressure for the column.
-            pressure_units: Units of the current pressure/surface pressure.
+            variable: CfVariable object.
+            surface_values: Array of surface values, or None to use the lowest level above the
+                            surface.
+            surface_pressure: Array of surface pressures for each column, in the same units as
+                              the variable's pressure coordinate.
+            indices: Array of the number of levels above the surface in each column.
             converter: UnitsConverter object.
-            fill_value: Value used for constant extrapolation outside current pressure bounds.
 
         Returns:
-            The new column pressures and remapped column variable values.
+            Array of remapped values, with the new levels in place of the pressure axis.
         """
-        interpolate = interp1d(pressure, variable, bounds_error=False, fill_value=fill_value)
-        p = self.pressure(surface_pressure, pressure_units, converter)
-        return p, interpolate(p)
+        parent, pressure_index = variable.parent, variable.pressure_index
+        pressure, pressure_units = variable.pressure, variable.pressure_units
+        a_sum = self._a_sum*converter.convert(self.units, pressure_units)
+        x = to_columns(asarray(parent[...], dtype=self.dtype), pressure_index)
+        if surface_values is not None:
+            surface_values = ravel(asarray(surface_values, dtype=self.dtype))
+
+        #Interpolate blocks of columns, adding in the surface values and ignoring points
+        #undergound.  Working on a block at a time keeps the size of the intermediate
+        #arrays independent of the size of the field.
+        y = empty((x.shape[0], len(self.level_map)), dtype=self.dtype)
+        for i in range(0, x.shape[0], column_block_size):
+            block = slice(i, i + column_block_size)
+            columns, n, sp = x[block], indices[block], surface_pressure[block]
+            if surface_values is None:
+                sv = columns[arange(columns.shape[0]), n-1]
+            else:
+                sv = surface_values[block]
+            new_pressure = self._pressure(a_sum, sp)
+            y[block] = interpolate_columns(columns, pressure, sv, sp, n, new_pressure)
+        return from_columns(y, parent.shape, pressure_index)
 
     def remap_all(self, level_dataset, surface_dataset, output, surface_pressure,
                   surface_variables, converter):
@@ -107,32 +146,46 @@ class VerticalRemapper(object):
              CfDataset(output, "w") as new_dataset:
 
             dimensions = tuple([x for x in level_data.dimension_variables])
-            pressure_coordinates = tuple([x for x in level_data.pressure_coordinates])
+            pressure_map = {x.name: (asarray(x[...], dtype=self.dtype), x.getncattr("units"))
+                            for x in level_data.pressure_coordinates}
             added_p = False
+            surface_pressures = {}
+            underground = {}
+
+            #Read the surface fields once, since they are shared by all of the variables.
+            sp = surface_data.variables[surface_pressure]
+            sp_data = sp[...]
+            surface_names = set(surface_variables[x] for x in level_data.variables
+                                if x in surface_variables)
+            surface_fields = {x: surface_data.variables[x][...] for x in surface_names}
+
             for v in level_data.variables.values():
                 if v in dimensions:
                     #Ignore dimension variables.  These will be copied automatically when
                     #they are used by the other variables.
                     continue
-                variable = CfVariable(v, pressure_coordinates)
+                variable = CfVariable(v, pressure_map)
                 if not variable.vertically_remappable:
                     #Directly copy all non-remappable variables.
                     new_dataset.copy_variable(variable.parent, level_data)
                     continue
 
+                parent, pressure = variable.parent, variable.pressure
+                pressure_units, pressure_index = variable.pressure_units, variable.pressure_index
+
                 #Add a new pressure dimension and variable for the remappable quantities.
                 coordinate = "sigma_level"
-                names = [x.name for x in variable.parent.get_dims()]
-                names[variable.pressure_index] = coordinate
+                names = list(parent.dimensions)
+                names[pressure_index] = coordinate
                 if not added_p:
                     sigma = new_dataset.create_coordinate(coordinate, len(self.level_map), int)
                     sigma.setncattr("positive", "down")
                     sigma[:] = linspace(1, len(self.level_map), num=len(self.level_map))[:]
                     remapped_p_name = "p"
-                    attrs = {"units" : variable.pressure_units,
+                    attrs = {"units" : pressure_units,
                              "standard_name" : "air_pressure"}
                     for name in names:
-                        if name != names[variable.pressure_index]:
+                        if name != names[pressure_index]:
                             if name not in new_dataset.dimensions:
                                 new_dataset.copy_dimension(level_data.dimensions[name])
                                 new_dataset.copy_variable(level_data.variables[name], level_data)
@@ -143,58 +196,133 @@ class VerticalRemapper(object):
                     remapped_p = None
 
                 #Create the remapped variable.
-                remapped_v = new_dataset.createVariable(variable.parent.name,
-                                                        variable.parent.datatype, names)
-                for attr in variable.parent.ncattrs():
+                remapped_v = new_dataset.createVariable(parent.name, parent.datatype, names)
+                for attr in parent.ncattrs():
                     if attr != "_FillValue":
-                        new_dataset.copy_attribute(variable.parent, attr)
+                        new_dataset.copy_attribute(parent, attr)
 
                 #Vertically remap the variable.
-                if variable.parent.name in surface_variables:
-                    sv = surface_data.variables[surface_variables[variable.parent.name]]
+                if parent.name in surface_variables:
+                    name = surface_variables[parent.name]
                     try:
-                        conversion = converter.convert(sv.getncattr("units"),
-                                                       variable.parent.getncattr("units"))
+                        units = surface_data.variables[name].getncattr("units")
+                        conversion = converter.convert(units, parent.getncattr("units"))
                     except KeyError:
                         conversion = 1.
-                    sv = sv[...]*conversion
+                    sv = surface_fields[name]*conversion
                 else:
                     sv = None
 
-                #Reshape data.  Make the variable 2d, with pressure as the fastest dimension.
-                rs = moveaxis(variable.parent[...], variable.pressure_index, -1)
-                new_shape = rs.shape
-                x = reshape(rs, (variable.parent.size//variable.pressure.size,
-                                 variable.pressure.size))
-                y = zeros(x.shape)
-                if sv is not None:
-                    x_surface = ravel(sv[...])
-                z = zeros(x.shape)
-
-                #Find the indices where the data in the file is underground.
-                sp = surface_data.variables[surface_pressure]
-                conversion = converter.convert(sp.getncattr("units"), variable.pressure_units)
-                sp = sp[...]*conversion
-                indices = ravel(searchsorted(variable.pressure, sp))
-                sp1d = ravel(sp)
-
-                #Loop through each column and interpolate, adding in the surface values and
-                #ignoring points undergound.
-                for i in range(x.shape[0]):
-                    if sv is None:
-                        xs = x[i,indices[i]-1]
-                    else:
-                        xs = x_surface[i]
-                    column = append(copy(x[i,:indices[i]]), xs)
-                    p = append(copy(variable.pressure[:indices[i]]), sp1d[i])
-                    z[i,:], y[i,:] = self.remap_column(column, p, sp1d[i],
-                                                       variable.pressure_units, converter,
-                                                       fill_value=column[0])
+                #The surface pressure only depends on the pressure units, so convert it once
+                #for all variables that share the same units.
+                if pressure_units not in surface_pressures:
+                    conversion = converter.convert(sp.getncattr("units"), pressure_units)
+                    surface_pressures[pressure_units] = ravel(asarray(sp_data*conversion,
+                                                                      dtype=self.dtype))
+                sp1d = surface_pressures[pressure_units]
+
+                #Find the indices where the data in the file is underground.  These are the same
+                #for all variables on the same pressure axis.
+                axis = parent.dimensions[pressure_index]
+                if axis not in underground:
+                    underground[axis] = searchsorted(pressure, sp1d)
                 if remapped_p is not None:
-                    remapped_p[...] = moveaxis(reshape(z, new_shape), -1,
-                                               variable.pressure_index)[...]
-                remapped_v[...] = moveaxis(reshape(y, new_shape), -1,
-                                           variable.pressure_index)[...]
+                    z = self.pressure(sp1d, pressure_units, converter)
+                    remapped_p[...] = from_columns(z, parent.shape, pressure_index)
+                    del z
+
+                #Remap in a separate method, so that the full-size intermediate arrays are
+                #released before the next variable is read.
+                remapped_v[...] = self.remap_variable(variable, sv, sp1d, underground[axis],
+                                                      converter)
+
+
+def to_columns(data, axis):
+    """Reshapes data to 2d (column, level), with the input axis as the fastest dimension.
+
+    Args:
+        data: Array of data.
+        axis: Index of the level axis.
+
+    Returns:
+        Array of columns.
+    """
+    return reshape(moveaxis(data, axis, -1), (-1, data.shape[axis]))
+
+
+def from_columns(data, shape, axis):
+    """Reverses to_columns, for data that may have a different number of levels.
+
+    Args:
+        data: Array of columns (column, level).
+        shape: Shape of the data that was passed to to_columns.
+        axis: Index of the level axis.
+
+    Returns:
+        View of the data, with the levels moved back to the input axis.
+    """
+    shape = tuple(shape[:axis]) + tuple(shape[axis+1:]) + (data.shape[-1],)
+    return moveaxis(reshape(data, shape), -1, axis)
+
+
+def interpolate_columns(variable, pressure, surface_values, surface_pressure, indices,
+                        new_pressure):
+    """Linearly interpolates columns to new pressures.
+
+    Each column is made up of the levels above the surface followed by the surface value.
+    New pressures outside of a column are set to the column's top value.  Only plain arrays
+    are used, so that this can be swapped for a compiled kernel.
+
+    Args:
+        variable: Array of columns to remap (column, level).
+        pressure: Increasing pressures the columns are currently specified at.
+        surface_values: Array of surface values for each column.
+        surface_pressure: Array of surface pressures for each column.
+        indices: Array of the number of levels above the surface in each column.
+        new_pressure: Array of pressures to interpolate to (column, new level).
+
+    Returns:
+        Array of interpolated values (column, new level).
+    """
+    dtype = result_type(variable, pressure, surface_values, surface_pressure, new_pressure)
+    pressure = pressure.astype(dtype, copy=False)
+    columns = arange(variable.shape[0])[:, newaxis]
+    last = pressure.size - 1
+    surface = indices[:, newaxis]
+
+    #Find the pair of column points that bracket each new pressure.  Point number indices[i]
+    #of column i is the surface, so only the upper point can be the surface.  The work
+    #arrays are updated in place to limit the number of full-size temporaries.
+    upper = searchsorted(pressure, new_pressure)
+    minimum(upper, surface, out=upper)
+    maximum(upper, 1, out=upper)
+    at_surface = upper == surface
+    lower = upper - 1
+    minimum(upper, last, out=upper)
+    p_lower = pressure[lower]
+    p_upper = pressure[upper]
+    copyto(p_upper, surface_pressure[:, newaxis], where=at_surface)
+    y_lower = variable[columns, lower].astype(dtype, copy=False)
+    y = variable[columns, upper].astype(dtype, copy=False)
+    copyto(y, surface_values[:, newaxis], where=at_surface)
+
+    #y = y_lower + (new_pressure - p_lower)*(y_upper - y_lower)/(p_upper - p_lower).
+    y -= y_lower
+    p_upper -= p_lower
+    y /= p_upper
+    subtract(new_pressure, p_lower, out=p_lower)
+    y *= p_lower
+    y += y_lower
+
+    #Use the top value of each column outside of the column's pressure range.  Columns
+    #with no levels above the surface only contain the surface value.
+    p_top = where(indices > 0, pressure[0], surface_pressure)[:, newaxis]
+    y_top = where(indices > 0, variable[:, 0], surface_values)[:, newaxis]
+    outside = new_pressure < p_top
+    outside |= new_pressure > surface_pressure[:, newaxis]
+    outside |= (indices == 0)[:, newaxis]
+    copyto(y, y_top, where=outside)
+    return y
 
 
 a_era_interim = asarray([0.00, 0.20, 0.38, 0.64, 0.96,
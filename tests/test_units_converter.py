@@ -0,0 +1,59 @@
+from re import match
+from unittest import TestCase, main
+
+from era5.units_converter import area, Conversion, distance, force, pressure, spellings, Units, \
+                                 UnitsConverter, UnitsError
+
+
+class TestSpellings(TestCase):
+    def test_expands_alternatives(self):
+        self.assertEqual(spellings(r"(hPa|mb|([Mm]|[Mm]illi)bar(s)?)$"),
+                         {"hPa", "mb", "Mbar", "mbar", "Mbars", "mbars", "Millibar",
+                          "millibar", "Millibars", "millibars"})
+
+    def test_rejects_unanchored(self):
+        self.assertIsNone(spellings(r"hPa"))
+
+    def test_rejects_group_extensions(self):
+        for regex in (r"(?:hPa|mb)$", r"(?=x)x$", r"(?!y)x$", r"(?P<name>x)$", r"(?i)pa$"):
+            self.assertIsNone(spellings(regex), regex)
+
+    def test_rejects_misplaced_quantifier(self):
+        for regex in (r"a??$", r"?a$", r"(|?)a$", r"a|?$"):
+            self.assertIsNone(spellings(regex), regex)
+
+    def test_spellings_match(self):
+        regex = r"(m|[Mm]eter(s)?)$"
+        for name in spellings(regex):
+            self.assertTrue(match(regex, name), name)
+
+
+class TestUnitsConverter(TestCase):
+    def test_first_match_wins(self):
+        converter = UnitsConverter((Conversion(r"(?:hPa|mb)$", 100., pressure),
+                                    Conversion(r"hPa$", 1., distance)))
+        self.assertEqual(converter.to_si("hPa"), (pressure, 100.))
+        self.assertEqual(converter.to_si("mb"), (pressure, 100.))
+
+    def test_no_spurious_spellings(self):
+        converter = UnitsConverter((Conversion(r"(?:hPa|mb)$", 100., pressure),))
+        with self.assertRaises(UnitsError):
+            converter.to_si("?:hPa")
+
+
+class TestUnits(TestCase):
+    def test_algebra(self):
+        self.assertEqual(force/area, pressure)
+        self.assertEqual(distance*distance/distance, distance)
+
+    def test_not_a_tuple(self):
+        self.assertNotEqual(Units(), (0,)*7)
+        self.assertNotEqual((0,)*7, Units())
+        for bad in (lambda: 2*pressure, lambda: pressure*2, lambda: pressure + pressure,
+                    lambda: (0,) + pressure, lambda: pressure/2):
+            with self.assertRaises(TypeError):
+                bad()
+
+
+if __name__ == "__main__":
+    main()
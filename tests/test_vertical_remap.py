@@ -0,0 +1,68 @@
+from unittest import TestCase, main
+
+from numpy import arange, array, concatenate, interp, linspace, moveaxis, searchsorted, stack
+from numpy.testing import assert_allclose, assert_array_equal
+
+from era5.vertical_remap import from_columns, interpolate_columns, to_columns
+
+
+def reference(variable, pressure, surface_values, surface_pressure, new_pressure):
+    """Interpolates one column at a time with numpy.interp."""
+    result = []
+    for x, sv, sp, p in zip(variable, surface_values, surface_pressure, new_pressure):
+        n = searchsorted(pressure, sp)
+        xp = concatenate((pressure[:n], [sp]))
+        fp = concatenate((x[:n], [sv]))
+        result.append(interp(p, xp, fp, left=fp[0], right=fp[0]))
+    return array(result)
+
+
+class TestInterpolateColumns(TestCase):
+    def setUp(self):
+        self.pressure = linspace(100., 1000., 10)
+        self.variable = 200. + 0.1*self.pressure + arange(5)[:, None]
+
+    def check(self, surface_pressure, new_pressure):
+        surface_pressure = array(surface_pressure)
+        surface_values = 300. + arange(surface_pressure.size)
+        indices = searchsorted(self.pressure, surface_pressure)
+        variable = self.variable[:surface_pressure.size]
+        y = interpolate_columns(variable, self.pressure, surface_values, surface_pressure,
+                                indices, new_pressure)
+        assert_allclose(y, reference(variable, self.pressure, surface_values,
+                                     surface_pressure, new_pressure))
+
+    def test_surface_between_levels(self):
+        self.check([550., 975.], stack([linspace(120., 550., 7), linspace(100., 975., 7)]))
+
+    def test_surface_on_level(self):
+        self.check([600., 1000.], stack([linspace(150., 600., 7), linspace(100., 1000., 7)]))
+
+    def test_surface_below_last_level(self):
+        self.check([1050., 1013.], stack([linspace(900., 1050., 7), linspace(990., 1013., 7)]))
+
+    def test_surface_above_first_level(self):
+        self.check([80., 100.], stack([linspace(10., 80., 7), linspace(10., 100., 7)]))
+
+    def test_outside_column(self):
+        #Targets above the top level and below the surface use the top value.
+        self.check([550., 1050.], stack([linspace(10., 700., 7), linspace(50., 1100., 7)]))
+
+
+class TestColumns(TestCase):
+    def test_round_trip(self):
+        data = arange(2*3*4*5).reshape(2, 3, 4, 5)
+        for axis in range(data.ndim):
+            columns = to_columns(data, axis)
+            self.assertEqual(columns.shape, (data.size//data.shape[axis], data.shape[axis]))
+            assert_array_equal(columns, moveaxis(data, axis, -1).reshape(columns.shape))
+            assert_array_equal(from_columns(columns, data.shape, axis), data)
+
+    def test_new_levels(self):
+        data = arange(2*3*4*5).reshape(2, 3, 4, 5)
+        columns = to_columns(data, 2)[:, :2]
+        assert_array_equal(from_columns(columns, data.shape, 2), data[:, :, :2, :])
+
+
+if __name__ == "__main__":
+    main()